@@ -1,279 +1,424 @@
-import h5py
-import numpy
-import os
-import glob
-from numpy import genfromtxt
-
-def write_numeric_attribute(group, attribute_name, number, dtype):
-    """Write numeric attribute to imaris hdf5 file.
-    :param group: hdf5 group object.
-    :param attribute_name: name of attribute.
-    :param number: value to be written.
-    :param dtype: numeric datatype.
-    .. code-block:: python
-        write_numeric_attribute(info, 'NumberOfImages', 54, numpy.uint32)
-    """
-    # check if attribute already exists, delete if it does
-    if h5py.h5a.exists(loc=group.id, name=attribute_name.encode('ascii')):
-        h5py.h5a.delete(loc=group.id, name=attribute_name.encode('ascii'))
-    # create attribute using high-level h5py api
-    group.attrs.create(name=attribute_name, data=number, dtype=dtype)
-
-def write_string_attribute(group, attribute_name, string):
-    """Write string attribute to imaris hdf5 file.
-    Note: Strings must be ascii formated, length 1, with nullterms.
-    Note: Full low-level h5py API documentation available at https://api.h5py.org/index.html
-    :param group: hdf5 group object.
-    :param attribute_name: name of attribute.
-    :param string: string to be written.
-    .. code-block:: python
-        write_string_attribute(info, 'ImageSizeX', '500')
-    """
-    # ascii encoded h5 string with length 1
-    ascii_type=h5py.string_dtype(encoding='ascii', length=1)
-    # create ascii encoded numpy string
-    numpy_string=numpy.frombuffer(buffer=string.encode('ascii'), dtype=ascii_type)
-    # copy of the null-terminated fixed-length string datatype
-    type_id=h5py.h5t.TypeID.copy(h5py.h5t.C_S1)
-    # set the total size of the datatype, in bytes.
-    type_id.set_size(1)
-    # set the padding type to null-terminated only (c style)
-    type_id.set_strpad(h5py.h5t.STR_NULLTERM)
-    # create simple dataspace for numpy string
-    dataspace=h5py.h5s.create_simple((len(numpy_string),))
-    # check if attribute already exists, delete if it does
-    if h5py.h5a.exists(loc=group.id, name=attribute_name.encode('ascii')):
-        h5py.h5a.delete(loc=group.id, name=attribute_name.encode('ascii'))
-    # create attribute using low-level h5py api
-    attribute=h5py.h5a.create(loc=group.id, name=attribute_name.encode('ascii'), tid=type_id, space=dataspace)
-    # write numpy string to h5 attribute
-    attribute.write(numpy_string, mtype=attribute.get_type())
-
-def imaris_linker(path, filename, x_tiles, y_tiles, z_tiles, channels, color_range, color, color_table):
-    """Generated combined imaris file with external links to imaris tile files.
-    :param path: directory containing imaris hdf5 tile files.
-    :param filename: combined imaris filename.
-    :param x_tiles: number of x tiles in dataset.
-    :param y_tiles: number of y tiles in dataset.
-    :param z_tiles: number of z tiles in dataset.
-    :param channels: number of channels in dataset.
-    :param color_range: min/max color range values.
-    :param color: rgb color values.
-    .. code-block:: python
-        imaris_linker('C:/example_data', 2, 3, 1, [488], [100, 500], [1, 1, 1])
-    """
-    # create output imaris file handle
-    file_out=h5py.File(filename, 'w')
-    # grab handle to file's parent group
-    info=file_out['/']
-    # write required attribute metadata for linking
-    write_string_attribute(info, 'DataSetDirectoryName', 'DataSet')
-    write_string_attribute(info, 'DataSetInfoDirectoryName', 'DataSetInfo')
-    write_string_attribute(info, 'ImarisDataSet', 'ImarisDataSet')
-    write_string_attribute(info, 'ImarisVersion', '5.5.0')
-    write_numeric_attribute(info, 'NumberOfDataSets', x_tiles*y_tiles*z_tiles*len(channels), numpy.uint32)
-    write_string_attribute(info, 'ThumbnailDirectoryName', 'Thumbnail')
-
-    # initialize variables
-    tile=0
-    xmin=float('inf')
-    xmax=float('-inf')
-    ymin=float('inf')
-    ymax=float('-inf')
-    zmin=float('inf')
-    zmax=float('-inf')
-
-    # loop over all expected imaris files
-    for c in range(0, len(channels)):
-        for z in range(0, z_tiles):
-            for y in range(0, y_tiles):
-                for x in range(0, x_tiles):
-                    # create input imaris file handle
-                    file_in=h5py.File(f'tile_x_{x:0>4d}_y_{y:0>4d}_z_{z:0>4d}_ch_{channels[c]}.ims', 'r')
-                    # create output file group names based on tile #
-                    if tile == 0:
-                        data_name = 'DataSet'
-                        data_info_name = 'DataSetInfo'
-                    else:
-                        data_name = f'DataSet{tile}'
-                        data_info_name = f'DataSetInfo{tile}'
-                    # copy datasetinfo from input file to combined output file
-                    file_in.copy(source='DataSetInfo/Channel 0', dest=file_out, name=f'{data_info_name}/Channel 0')
-                    file_in.copy(source='DataSetInfo/Image', dest=file_out, name=f'{data_info_name}/Image')
-                    file_in.copy(source='DataSetInfo/ImarisDataSet', dest=file_out, name=f'{data_info_name}/ImarisDataSet')
-                    file_in.copy(source='DataSetInfo/Log', dest=file_out, name=f'{data_info_name}/Log')
-                    # track max extents
-                    info=file_out[f'{data_info_name}/Image']
-                    xmin = min(xmin, float(str(info.attrs.get('ExtMin0'), 'ascii')))
-                    xmax = max(xmax, float(str(info.attrs.get('ExtMax0'), 'ascii')))
-                    ymin = min(ymin, float(str(info.attrs.get('ExtMin1'), 'ascii')))
-                    ymax = max(ymax, float(str(info.attrs.get('ExtMax1'), 'ascii')))
-                    zmin = min(zmin, float(str(info.attrs.get('ExtMin2'), 'ascii')))
-                    zmax = max(zmax, float(str(info.attrs.get('ExtMax2'), 'ascii')))
-                    info.attrs.__delitem__('RecordingDate')
-                    # update color and range for given tile
-                    info=file_out[f'{data_info_name}/Channel 0']
-                    if color_table is not None:
-                        # color mode is table
-                        write_string_attribute(info, 'ColorMode', 'TableColor')
-                        # assume entries are dimension 0, rgb is dimension 1
-                        write_string_attribute(info, 'ColorTableLength', f'{color_table.shape[0]}')
-                        # default to opacity as always 1
-                        write_string_attribute(info, 'ColorOpacity', '1.000')
-                        # change to string list each with 3 decimal places
-                        temp_string = ["%.3f" % x for x in color_table.flatten()]
-                        # add space in between entries and convert to single long string
-                        string = ' '.join(temp_string)
-                        # add space at end of string
-                        string = string + ' '
-                        # format string 
-                        # ascii encoded h5 string with length 1
-                        ascii_type=h5py.string_dtype(encoding='ascii', length=1)
-                        # create ascii encoded numpy string
-                        numpy_string=numpy.frombuffer(buffer=string.encode('ascii'), dtype=ascii_type)
-                        # copy of the null-terminated fixed-length string datatype
-                        type_id=h5py.h5t.TypeID.copy(h5py.h5t.C_S1)
-                        # set the total size of the datatype, in bytes.
-                        type_id.set_size(1)
-                        # set the padding type to null-terminated only (c style)
-                        type_id.set_strpad(h5py.h5t.STR_NULLTERM)
-                        # create simple dataspace for numpy string
-                        dataspace=h5py.h5s.create_simple((len(numpy_string),))
-                        # create color table dataset container. name must be in bytes not str
-                        tableid=h5py.h5d.create(loc=info.id, name=b'ColorTable', tid=type_id, space=dataspace)
-                        # write color table string to dataset. not sure why, but dataspace needs to be first two args.
-                        tableid.write(dataspace, dataspace, numpy_string, mtype=tableid.get_type())
-                    else:
-                        # color mode is base
-                        write_string_attribute(info, 'ColorMode', 'BaseColor')
-                        # assume input color list goes r1 g1 b1 r2 g2 b2...
-                        write_string_attribute(info, 'Color', f'{color[0+3*c]:.1f} {color[1+3*c]:.1f} {color[2+3*c]:.1f}')
-                    # assume input color range list goes min1 max1 min2 max2...
-                    write_string_attribute(info, 'ColorRange', f'{color_range[0+2*c]:.1f} {color_range[1+2*c]:.1f}')
-                    # create data group in output file
-                    data=file_out.create_group(data_name)
-                    # loop over all resolution levels
-                    num_res = len(file_in['DataSet'].keys())
-                    for r in range(0, len(file_in['DataSet'].keys())):
-                        # create hard link within output file to data location in input file
-                        data[f'ResolutionLevel {r}/TimePoint 0/Channel 0']=h5py.ExternalLink(f'./tile_x_{x:0>4d}_y_{y:0>4d}_z_{z:0>4d}_ch_{channels[c]}.ims', f'DataSet/ResolutionLevel {r}/TimePoint 0/Channel 0')
-                    # close input file handle
-                    file_in.close()
-                    # increment tile
-                    tile += 1
-    # close output file handle
-    file_out.close()
-
-    # create dummy volume with max extents for imaris visualization
-    file_out = h5py.File('dummy.ims','w')
-    # grab handle to file's parent group
-    info=file_out['/']
-    # write required parent metadata attributes
-    write_string_attribute(info, 'DataSetDirectoryName', 'DataSet')
-    write_string_attribute(info, 'DataSetInfoDirectoryName', 'DataSetInfo')
-    write_string_attribute(info, 'ImarisDataSet', 'ImarisDataSet')
-    write_string_attribute(info, 'ImarisVersion', '5.5.0')
-    write_numeric_attribute(info, 'NumberOfDataSets', 1)
-    write_string_attribute(info, 'ThumbnailDirectoryName', 'Thumbnail')
-
-    data_name = f'DataSet'
-    data_info_name = f'DataSetInfo'
-    # write a dummy dataset with 1024 size
-    data = file_out.create_group(data_name)
-    size = 1024
-    dset = file_out.create_dataset(f'{data_name}/ResolutionLevel {r}/TimePoint 0/Channel 0/Data', shape = (size,size,size), chunks = (size,size,size), dtype = 'uint16')
-    info = data[f'ResolutionLevel {r}/TimePoint 0/Channel 0']
-    write_string_attribute(info, 'HistogramMax', '255.00')
-    write_string_attribute(info, 'HistogramMin', '0.00')
-    write_string_attribute(info, 'ImageSizeX', str(size))
-    write_string_attribute(info, 'ImageSizeY', str(size))
-    write_string_attribute(info, 'ImageSizeZ', str(size))
-    # write dataset info channel metadata attributes
-    info = file_out.create_group(f'{data_info_name}/Channel 0')
-    write_string_attribute(info, 'Description','(description not specified)')
-    write_string_attribute(info, 'Name','Dummy Volume')
-    write_string_attribute(info, 'Color','1.000 1.000 1.000')
-    write_string_attribute(info, 'ColorMode','BaseColor')
-    write_string_attribute(info, 'ColorOpacity','1.000')
-    write_string_attribute(info, 'GammaCorrection','1.000')
-    write_string_attribute(info, 'ColorRange','0.000 255.000')
-    # write dataset info image metadata attributes
-    info = file_out.create_group(f'{data_info_name}/Image')
-    write_string_attribute(info,'Description','(description not specified)')
-    write_string_attribute(info, 'ExtMin0', str(xmin))
-    write_string_attribute(info, 'ExtMin1', str(ymin))
-    write_string_attribute(info, 'ExtMin2', str(zmin))
-    write_string_attribute(info, 'ExtMax0', str(xmax))
-    write_string_attribute(info, 'ExtMax1', str(ymax))
-    write_string_attribute(info, 'ExtMax2', str(zmax))
-    write_string_attribute(info,'Name','(name not specified)')
-    write_string_attribute(info,'Unit','um')
-    write_string_attribute(info,'ResampleDimensionX','true')
-    write_string_attribute(info,'ResampleDimensionY','true')
-    write_string_attribute(info,'ResampleDimensionZ','true')
-    write_string_attribute(info,'X',str(1024))
-    write_string_attribute(info,'Y',str(1024))
-    write_string_attribute(info,'Z',str(1024))
-    # write dataset info ims metadata attributes            
-    info = file_out.create_group(f'{data_info_name}/ImarisDataSet')
-    write_string_attribute(info,'Creator','PyImarisWriter')
-    write_string_attribute(info,'NumberOfImages',str(1))
-    write_string_attribute(info,'Version','1.0.0')
-    # write dataset info log metadata attributes
-    info = file_out.create_group(f'{data_info_name}/Log')
-    write_string_attribute(info,'Entries',str(0))
-
-    # close output file handle
-    file_out.close()
-
-if __name__ == "__main__":
-    from argparse import ArgumentParser
-    parser = ArgumentParser()
-    parser.add_argument("--path", type=str, default="C:")
-    parser.add_argument("--filename", type=str, default="test.ims")
-    parser.add_argument("--x_tiles", type=int, default=1)
-    parser.add_argument("--y_tiles", type=int, default=1)
-    parser.add_argument("--z_tiles", type=int, default=1)
-    parser.add_argument("--channels", type=int, nargs='+', default=[488])
-    parser.add_argument("--color_range", type=int, nargs='+', default=[0, 1000])
-    parser.add_argument("--color", type=float, nargs='+', default=None)
-    parser.add_argument("--color_table", type=str, default=None)
-    args = parser.parse_args()
-    
-    if args.x_tiles < 0 or args.y_tiles < 0 or args.z_tiles < 0:
-        raise ValueError('tiles cannot be negative.')
-    if not isinstance(args.channels, list):
-        raise TypeError('channels is not a list.')
-    if not isinstance(args.color_range, list):
-        raise TypeError('color range is not a list.')
-    if args.color and args.color_table:
-        raise ValueError('must choose color or color table, not both.')
-    if args.color and not args.color_table:
-        if not isinstance(args.color, list):
-            raise TypeError('color is not a list.')
-        if len(args.color) != 3*len(args.channels):
-            raise ValueError('color must have 3 rgb values.')
-        color_table = None
-    if args.color_table and not args.color:
-        if not isinstance(args.color_table, str):
-            raise TypeError('color table is not a string')
-        # check local csv color tables
-        color_tables=glob.glob('*.csv')
-        # if specified color table is not present, raise error
-        if f'{args.color_table}.csv' not in color_tables:
-            raise ValueError('color table not valid, no csv file present.')
-        # read colormap csv file
-        color_table = genfromtxt(f'{args.color_table}.csv', delimiter=',')
-        # normalize to maximum of 1.0
-        color_table = color_table/255.0
-    if len(args.color_range) != 2*len(args.channels):
-        raise ValueError('color range must have 2 values (min/max).')
-    os.chdir(args.path)
-    # check input values
-    files = glob.glob('./*.ims')
-    if not files:
-        raise ValueError('no ims files in specified directory.')
-    if args.filename in files:
-        raise ValueError('output filename is the same as ims file in directory.')
-    imaris_linker(args.path, args.filename, args.x_tiles, args.y_tiles,
-                  args.z_tiles, args.channels, args.color_range, args.color, color_table)
+import functools
+import h5py
+import numpy
+import os
+import glob
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+from numpy import genfromtxt
+
+# ascii encoded h5 string with length 1, built once at import
+_ASCII_TYPE=h5py.string_dtype(encoding='ascii', length=1)
+
+# copy of the null-terminated fixed-length string datatype, built once at import
+_ASCII_NULLTERM_TID=h5py.h5t.TypeID.copy(h5py.h5t.C_S1)
+# set the total size of the datatype, in bytes.
+_ASCII_NULLTERM_TID.set_size(1)
+# set the padding type to null-terminated only (c style)
+_ASCII_NULLTERM_TID.set_strpad(h5py.h5t.STR_NULLTERM)
+
+@functools.lru_cache(maxsize=64)
+def _dataspace_for(length):
+    """Return a cached simple dataspace of the given length."""
+    return h5py.h5s.create_simple((length,))
+
+# reusable scratch buffer backing the numpy views over str attribute values, safe to
+# share because all attribute writes happen on the main thread and copy immediately
+_SCRATCH=bytearray(4096)
+
+# file-access property list shared by all read-only tile probes, built once
+_TILE_FAPL=h5py.h5p.create(h5py.h5p.FILE_ACCESS)
+# no raw-data chunk cache since only metadata is read
+_TILE_FAPL.set_cache(0, 0, 0, 0.75)
+# cluster the many small metadata reads into fewer larger ones
+_TILE_FAPL.set_sieve_buf_size(4*1024*1024)
+_TILE_FAPL.set_meta_block_size(8192)
+
+# pre-encoded names of the attributes written once per tile
+_N_COLOR=b'Color'
+_N_COLORMODE=b'ColorMode'
+_N_COLOROPACITY=b'ColorOpacity'
+_N_COLORRANGE=b'ColorRange'
+_N_COLORTABLELENGTH=b'ColorTableLength'
+
+def write_numeric_attribute(group, attribute_name, number, dtype, *, overwrite=True):
+    """Write numeric attribute to imaris hdf5 file.
+    :param group: hdf5 group object.
+    :param attribute_name: name of attribute.
+    :param number: value to be written.
+    :param dtype: numeric datatype.
+    :param overwrite: delete pre-existing attribute before writing.
+    .. code-block:: python
+        write_numeric_attribute(info, 'NumberOfImages', 54, numpy.uint32)
+    """
+    if overwrite:
+        # encode attribute name once for the exists/delete pair
+        name_bytes=attribute_name.encode('ascii')
+        # check if attribute already exists, delete if it does
+        if h5py.h5a.exists(loc=group.id, name=name_bytes):
+            h5py.h5a.delete(loc=group.id, name=name_bytes)
+    # create attribute using high-level h5py api
+    group.attrs.create(name=attribute_name, data=number, dtype=dtype)
+
+def write_string_attribute(group, attribute_name, string, *, overwrite=True):
+    """Write string attribute to imaris hdf5 file.
+    Note: Strings must be ascii formated, length 1, with nullterms.
+    Note: Full low-level h5py API documentation available at https://api.h5py.org/index.html
+    :param group: hdf5 group object.
+    :param attribute_name: name of attribute, str or pre-encoded ascii bytes.
+    :param string: string to be written, str or pre-encoded ascii bytes.
+    :param overwrite: delete pre-existing attribute before writing.
+    .. code-block:: python
+        write_string_attribute(info, 'ImageSizeX', '500')
+    """
+    # encode attribute name once, callers on the hot path pass pre-encoded bytes
+    if isinstance(attribute_name, str):
+        attribute_name=attribute_name.encode('ascii')
+    # encode value once, callers on the hot path pass pre-encoded bytes
+    if isinstance(string, str):
+        encoded=string.encode('ascii')
+        if len(encoded) <= len(_SCRATCH):
+            # stage short values in the shared scratch buffer, the view below then
+            # carries no fresh allocation of its own
+            _SCRATCH[:len(encoded)]=encoded
+            string=memoryview(_SCRATCH)[:len(encoded)]
+        else:
+            string=encoded
+    # create ascii encoded numpy string, frombuffer views the bytes without copying
+    numpy_string=numpy.frombuffer(buffer=string, dtype=_ASCII_TYPE)
+    # reuse the module-level null-terminated string datatype
+    type_id=_ASCII_NULLTERM_TID
+    # grab cached simple dataspace for numpy string
+    dataspace=_dataspace_for(len(numpy_string))
+    if overwrite:
+        # check if attribute already exists, delete if it does
+        if h5py.h5a.exists(loc=group.id, name=attribute_name):
+            h5py.h5a.delete(loc=group.id, name=attribute_name)
+    # create attribute using low-level h5py api
+    attribute=h5py.h5a.create(loc=group.id, name=attribute_name, tid=type_id, space=dataspace)
+    # write numpy string to h5 attribute, reusing the cached type id as the memory type
+    attribute.write(numpy_string, mtype=type_id)
+
+def _prefetch(tile_names):
+    """Hint the kernel to pre-populate the page cache with each tile file's header.
+    :param tile_names: imaris hdf5 tile filenames to prefetch.
+    """
+    for tile_name in tile_names:
+        try:
+            fd=os.open(tile_name, os.O_RDONLY)
+        except OSError:
+            # missing tiles surface a proper error when probed
+            continue
+        try:
+            # ask for the superblock and first metadata blocks only
+            os.posix_fadvise(fd, 0, 65536, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+def probe(tile_name):
+    """Open imaris tile file and count its resolution levels.
+    :param tile_name: imaris hdf5 tile filename.
+    :return: open file handle and number of resolution levels.
+    .. code-block:: python
+        file_in, num_res = probe('tile_x_0000_y_0000_z_0000_ch_488.ims')
+    """
+    # create input imaris file handle with the shared metadata-clustering access properties
+    file_in=h5py.File(h5py.h5f.open(tile_name.encode('ascii'), h5py.h5f.ACC_RDONLY, fapl=_TILE_FAPL))
+    # count resolution levels in input file without materializing the link names
+    num_res=file_in['DataSet'].id.get_num_objs()
+    return file_in, num_res
+
+def imaris_linker(path: str, filename: str, x_tiles: int, y_tiles: int, z_tiles: int,
+                  channels: list, color_range: list, color: list | None,
+                  color_table: numpy.ndarray | None, dedupe_common_info: bool = True,
+                  max_workers: int = 32) -> None:
+    """Generated combined imaris file with external links to imaris tile files.
+    Note: Output file uses the latest hdf5 file format, readers need libhdf5 1.10+.
+    :param path: directory containing imaris hdf5 tile files.
+    :param filename: combined imaris filename.
+    :param x_tiles: number of x tiles in dataset.
+    :param y_tiles: number of y tiles in dataset.
+    :param z_tiles: number of z tiles in dataset.
+    :param channels: number of channels in dataset.
+    :param color_range: min/max color range values.
+    :param color: rgb color values.
+    :param dedupe_common_info: soft link ImarisDataSet/Log groups to tile 0 instead of copying per tile.
+    :param max_workers: number of threads pre-opening tile files.
+    .. code-block:: python
+        imaris_linker('C:/example_data', 2, 3, 1, [488], [100, 500], [1, 1, 1])
+    """
+    # file-creation property list with paged aggregation so metadata packs into aligned pages
+    fcpl=h5py.h5p.create(h5py.h5p.FILE_CREATE)
+    fcpl.set_file_space_strategy(h5py.h5f.FSPACE_STRATEGY_PAGE, True, 1)
+    fcpl.set_file_space_page_size(4*1024*1024)
+    # file-access property list with a page buffer to batch the many small metadata writes
+    fapl=h5py.h5p.create(h5py.h5p.FILE_ACCESS)
+    fapl.set_page_buffer_size(16*1024*1024, 50, 50)
+    # use the latest file format for compact group, link and attribute encodings
+    fapl.set_libver_bounds(h5py.h5f.LIBVER_LATEST, h5py.h5f.LIBVER_LATEST)
+    # no raw-data chunk cache, the combined file never reads back what it writes
+    fapl.set_cache(0, 0, 0, 0.0)
+    # disable flash-triggered metadata cache resizes, all flushing happens at close
+    mdc=fapl.get_mdc_config()
+    mdc.flash_incr_mode=0
+    fapl.set_mdc_config(mdc)
+    # create output imaris file handle through the low-level api to pass both property
+    # lists, context managed so an error mid-run cannot leak a partially written file
+    with h5py.File(h5py.h5f.create(filename.encode('ascii'), h5py.h5f.ACC_TRUNC, fcpl=fcpl, fapl=fapl)) as file_out:
+        # grab handle to file's parent group
+        info=file_out['/']
+        # write required attribute metadata for linking
+        write_string_attribute(info, 'DataSetDirectoryName', 'DataSet', overwrite=False)
+        write_string_attribute(info, 'DataSetInfoDirectoryName', 'DataSetInfo', overwrite=False)
+        write_string_attribute(info, 'ImarisDataSet', 'ImarisDataSet', overwrite=False)
+        write_string_attribute(info, 'ImarisVersion', '5.5.0', overwrite=False)
+        write_numeric_attribute(info, 'NumberOfDataSets', x_tiles*y_tiles*z_tiles*len(channels), numpy.uint32, overwrite=False)
+        write_string_attribute(info, 'ThumbnailDirectoryName', 'Thumbnail', overwrite=False)
+
+        # initialize extent accumulator, interleaved as min0 max0 min1 max1 min2 max2
+        ext=numpy.array([float('inf'), float('-inf')]*3)
+
+        # flatten the channel/tile nest into a single index table, itertools.product
+        # matches the original c/z/y/x loop nesting with x varying fastest and yields
+        # plain python ints for the downstream indexing
+        tile_table=list(product(range(0, len(channels)), range(0, z_tiles),
+                                range(0, y_tiles), range(0, x_tiles)))
+        # list all expected imaris tile filenames in loop order
+        tile_names=[f'tile_x_{x:04d}_y_{y:04d}_z_{z:04d}_ch_{channels[c]}.ims' for c, z, y, x in tile_table]
+        # pre-build the './'-prefixed link targets once, plus ascii bytes for the low-level links
+        tile_links=[f'./{tile_name}' for tile_name in tile_names]
+        tile_links_bytes=[tile_link.encode('ascii') for tile_link in tile_links]
+        # precompute output group names, tile 0 keeps the default imaris names
+        data_names=['DataSet' if tile == 0 else f'DataSet{tile}' for tile in range(len(tile_names))]
+        data_info_names=['DataSetInfo' if tile == 0 else f'DataSetInfo{tile}' for tile in range(len(tile_names))]
+        # warm the page cache with each tile's header ahead of the probe pool, linux only
+        if hasattr(os, 'posix_fadvise'):
+            threading.Thread(target=_prefetch, args=(tile_names,), daemon=True).start()
+        # pre-open all tile files in parallel, opening hdf5 files is i/o bound and independent per tile
+        executor=ThreadPoolExecutor(max_workers=max_workers)
+        probes=[executor.submit(probe, tile_name) for tile_name in tile_names]
+
+        # link-creation property list that auto-creates the intermediate groups, built once
+        lcpl=h5py.h5p.create(h5py.h5p.LINK_CREATE)
+        lcpl.set_create_intermediate_group(True)
+        # group-creation property list that starts attribute storage dense from the first
+        # insert, avoiding the compact-to-dense header rewrite as groups grow, built once
+        gcpl=h5py.h5p.create(h5py.h5p.GROUP_CREATE)
+        gcpl.set_attr_phase_change(0, 0)
+        # per-resolution-level link and source paths are invariant across tiles, grown on demand
+        link_names=[]
+        source_paths=[]
+
+        # precompute per-channel color and range strings pre-encoded to ascii, they only
+        # depend on the channel
+        # assume input color range list goes min1 max1 min2 max2...
+        range_bytes=[f'{color_range[2*i]:.1f} {color_range[2*i+1]:.1f}'.encode('ascii') for i in range(len(channels))]
+        # batch the channel-group attribute writes into one dict per channel, applied in a
+        # single pass inside the tile loop
+        if color_table is not None:
+            channel_attrs=[{_N_COLORMODE: b'TableColor',
+                            # assume entries are dimension 0, rgb is dimension 1
+                            _N_COLORTABLELENGTH: f'{color_table.shape[0]}'.encode('ascii'),
+                            # default to opacity as always 1
+                            _N_COLOROPACITY: b'1.000',
+                            _N_COLORRANGE: range_bytes[i]} for i in range(len(channels))]
+            # format the whole table once with numpy's vectorized formatter, each entry with
+            # 3 decimal places, a space in between entries and a space at the end
+            color_table_string=' '.join(numpy.char.mod('%.3f', color_table.ravel()))+' '
+            # create ascii encoded numpy string once, the table never changes per tile
+            color_table_numpy=numpy.frombuffer(buffer=color_table_string.encode('ascii'), dtype=_ASCII_TYPE)
+        else:
+            # assume input color list goes r1 g1 b1 r2 g2 b2...
+            channel_attrs=[{_N_COLORMODE: b'BaseColor',
+                            _N_COLOR: f'{color[3*i]:.1f} {color[3*i+1]:.1f} {color[3*i+2]:.1f}'.encode('ascii'),
+                            _N_COLORRANGE: range_bytes[i]} for i in range(len(channels))]
+
+        # extent attribute names read back from every tile's image group
+        ext_keys=('ExtMin0', 'ExtMax0', 'ExtMin1', 'ExtMax1', 'ExtMin2', 'ExtMax2')
+
+        # loop over all expected imaris files in a single linear pass
+        for tile in range(0, len(tile_names)):
+            # grab channel index for this tile from the index table
+            c=tile_table[tile][0]
+            # grab pre-opened input imaris file handle
+            file_in, num_res=probes[tile].result()
+            # grab precomputed output file group names based on tile #
+            data_name=data_names[tile]
+            data_info_name=data_info_names[tile]
+            # copy entire datasetinfo subtree from input file to combined output file in one
+            # traversal, closing the input handle as soon as its metadata is consumed so the
+            # hdf5 metadata cache does not grow with the tile count
+            with file_in:
+                if tile == 0:
+                    # tile 0 keeps a full local copy that the soft links below resolve to
+                    file_in.copy(source='DataSetInfo', dest=file_out, name=data_info_name)
+                else:
+                    # per-tile color and geometry need local copies since their attributes are mutated
+                    file_in.copy(source='DataSetInfo/Channel 0', dest=file_out, name=f'{data_info_name}/Channel 0')
+                    file_in.copy(source='DataSetInfo/Image', dest=file_out, name=f'{data_info_name}/Image')
+                    if dedupe_common_info:
+                        # version strings and log are identical across tiles of one acquisition,
+                        # soft link to tile 0's copy instead of re-copying
+                        file_out[f'{data_info_name}/ImarisDataSet']=h5py.SoftLink('/DataSetInfo/ImarisDataSet')
+                        file_out[f'{data_info_name}/Log']=h5py.SoftLink('/DataSetInfo/Log')
+                    else:
+                        # leave the common groups in the tile file itself and link to them externally
+                        file_out[f'{data_info_name}/ImarisDataSet']=h5py.ExternalLink(tile_links[tile], 'DataSetInfo/ImarisDataSet')
+                        file_out[f'{data_info_name}/Log']=h5py.ExternalLink(tile_links[tile], 'DataSetInfo/Log')
+            # track max extents with one batched read of the six extent attributes
+            info=file_out[f'{data_info_name}/Image']
+            vals=numpy.fromiter((float(info.attrs[key].tobytes().decode('ascii')) for key in ext_keys),
+                                dtype=numpy.float64, count=6)
+            # reduce mins and maxes in place with numpy's vectorized kernels
+            numpy.minimum(ext[::2], vals[::2], out=ext[::2])
+            numpy.maximum(ext[1::2], vals[1::2], out=ext[1::2])
+            # drop the per-tile recording date through the low-level api, guarded so
+            # tiles written without one do not raise
+            if h5py.h5a.exists(info.id, b'RecordingDate'):
+                h5py.h5a.delete(info.id, b'RecordingDate')
+            # update color and range for given tile, overwrite since the copied group may
+            # carry color attributes of its own
+            info=file_out[f'{data_info_name}/Channel 0']
+            for attribute_name, value in channel_attrs[c].items():
+                write_string_attribute(info, attribute_name, value, overwrite=True)
+            if color_table is not None:
+                # grab cached simple dataspace for the precomputed table string
+                dataspace=_dataspace_for(len(color_table_numpy))
+                # create color table dataset container reusing the module-level null-terminated
+                # datatype. name must be in bytes not str
+                tableid=h5py.h5d.create(loc=info.id, name=b'ColorTable', tid=_ASCII_NULLTERM_TID, space=dataspace)
+                # write color table string to dataset. not sure why, but dataspace needs to be first two args.
+                tableid.write(dataspace, dataspace, color_table_numpy, mtype=_ASCII_NULLTERM_TID)
+            # create data group in output file with the shared group-creation property list
+            data=h5py.Group(h5py.h5g.create(file_out.id, data_name.encode('ascii'), gcpl=gcpl))
+            # grab pre-encoded tile link target for all resolution-level links
+            file_name=tile_links_bytes[tile]
+            # loop over all resolution levels
+            for r in range(0, num_res):
+                # extend cached per-level paths if a deeper level appears
+                if r == len(link_names):
+                    link_names.append(f'ResolutionLevel {r}/TimePoint 0/Channel 0'.encode('ascii'))
+                    source_paths.append(f'DataSet/ResolutionLevel {r}/TimePoint 0/Channel 0'.encode('ascii'))
+                # create external link within output file to data location in input file
+                data.id.links.create_external(link_names[r], file_name, source_paths[r], lcpl=lcpl)
+        # shut down tile file pre-open pool
+        executor.shutdown()
+        # unpack accumulated extents for the dummy volume below
+        xmin, xmax, ymin, ymax, zmin, zmax=ext
+
+    # create dummy volume with max extents for imaris visualization
+    with h5py.File('dummy.ims', 'w', libver='latest', track_order=False) as file_out:
+        # grab handle to file's parent group
+        info=file_out['/']
+        # write required parent metadata attributes
+        write_string_attribute(info, 'DataSetDirectoryName', 'DataSet', overwrite=False)
+        write_string_attribute(info, 'DataSetInfoDirectoryName', 'DataSetInfo', overwrite=False)
+        write_string_attribute(info, 'ImarisDataSet', 'ImarisDataSet', overwrite=False)
+        write_string_attribute(info, 'ImarisVersion', '5.5.0', overwrite=False)
+        write_numeric_attribute(info, 'NumberOfDataSets', 1, numpy.uint32, overwrite=False)
+        write_string_attribute(info, 'ThumbnailDirectoryName', 'Thumbnail', overwrite=False)
+
+        data_name = f'DataSet'
+        data_info_name = f'DataSetInfo'
+        # write a dummy dataset advertised at 1024 size, imaris computes the bounding box
+        # from the extents so the stored dataset can stay tiny instead of a 2 GiB chunk
+        data = file_out.create_group(data_name, track_order=False)
+        size = 1024
+        size_real = 8
+        dset = file_out.create_dataset(f'{data_name}/ResolutionLevel {r}/TimePoint 0/Channel 0/Data', shape = (size_real,size_real,size_real), chunks = (size_real,size_real,size_real), dtype = 'uint16')
+        info = data[f'ResolutionLevel {r}/TimePoint 0/Channel 0']
+        write_string_attribute(info, 'HistogramMax', '255.00', overwrite=False)
+        write_string_attribute(info, 'HistogramMin', '0.00', overwrite=False)
+        write_string_attribute(info, 'ImageSizeX', str(size), overwrite=False)
+        write_string_attribute(info, 'ImageSizeY', str(size), overwrite=False)
+        write_string_attribute(info, 'ImageSizeZ', str(size), overwrite=False)
+        # write dataset info channel metadata attributes
+        info = file_out.create_group(f'{data_info_name}/Channel 0', track_order=False)
+        write_string_attribute(info, 'Description','(description not specified)', overwrite=False)
+        write_string_attribute(info, 'Name','Dummy Volume', overwrite=False)
+        write_string_attribute(info, 'Color','1.000 1.000 1.000', overwrite=False)
+        write_string_attribute(info, 'ColorMode','BaseColor', overwrite=False)
+        write_string_attribute(info, 'ColorOpacity','1.000', overwrite=False)
+        write_string_attribute(info, 'GammaCorrection','1.000', overwrite=False)
+        write_string_attribute(info, 'ColorRange','0.000 255.000', overwrite=False)
+        # write dataset info image metadata attributes
+        info = file_out.create_group(f'{data_info_name}/Image', track_order=False)
+        write_string_attribute(info,'Description','(description not specified)', overwrite=False)
+        write_string_attribute(info, 'ExtMin0', str(xmin), overwrite=False)
+        write_string_attribute(info, 'ExtMin1', str(ymin), overwrite=False)
+        write_string_attribute(info, 'ExtMin2', str(zmin), overwrite=False)
+        write_string_attribute(info, 'ExtMax0', str(xmax), overwrite=False)
+        write_string_attribute(info, 'ExtMax1', str(ymax), overwrite=False)
+        write_string_attribute(info, 'ExtMax2', str(zmax), overwrite=False)
+        write_string_attribute(info,'Name','(name not specified)', overwrite=False)
+        write_string_attribute(info,'Unit','um', overwrite=False)
+        write_string_attribute(info,'ResampleDimensionX','true', overwrite=False)
+        write_string_attribute(info,'ResampleDimensionY','true', overwrite=False)
+        write_string_attribute(info,'ResampleDimensionZ','true', overwrite=False)
+        write_string_attribute(info,'X',str(1024), overwrite=False)
+        write_string_attribute(info,'Y',str(1024), overwrite=False)
+        write_string_attribute(info,'Z',str(1024), overwrite=False)
+        # write dataset info ims metadata attributes            
+        info = file_out.create_group(f'{data_info_name}/ImarisDataSet', track_order=False)
+        write_string_attribute(info,'Creator','PyImarisWriter', overwrite=False)
+        write_string_attribute(info,'NumberOfImages',str(1), overwrite=False)
+        write_string_attribute(info,'Version','1.0.0', overwrite=False)
+        # write dataset info log metadata attributes
+        info = file_out.create_group(f'{data_info_name}/Log', track_order=False)
+        write_string_attribute(info,'Entries',str(0), overwrite=False)
+
+
+if __name__ == "__main__":
+    from argparse import ArgumentParser
+    parser = ArgumentParser()
+    parser.add_argument("--path", type=str, default="C:")
+    parser.add_argument("--filename", type=str, default="test.ims")
+    parser.add_argument("--x_tiles", type=int, default=1)
+    parser.add_argument("--y_tiles", type=int, default=1)
+    parser.add_argument("--z_tiles", type=int, default=1)
+    parser.add_argument("--channels", type=int, nargs='+', default=[488])
+    parser.add_argument("--color_range", type=int, nargs='+', default=[0, 1000])
+    parser.add_argument("--color", type=float, nargs='+', default=None)
+    parser.add_argument("--color_table", type=str, default=None)
+    parser.add_argument("--max_workers", type=int, default=32)
+    args = parser.parse_args()
+    
+    if args.x_tiles < 0 or args.y_tiles < 0 or args.z_tiles < 0:
+        raise ValueError('tiles cannot be negative.')
+    if not isinstance(args.channels, list):
+        raise TypeError('channels is not a list.')
+    if not isinstance(args.color_range, list):
+        raise TypeError('color range is not a list.')
+    if args.color and args.color_table:
+        raise ValueError('must choose color or color table, not both.')
+    if args.color and not args.color_table:
+        if not isinstance(args.color, list):
+            raise TypeError('color is not a list.')
+        if len(args.color) != 3*len(args.channels):
+            raise ValueError('color must have 3 rgb values.')
+        color_table = None
+    if args.color_table and not args.color:
+        if not isinstance(args.color_table, str):
+            raise TypeError('color table is not a string')
+        # check local csv color tables
+        color_tables=glob.glob('*.csv')
+        # if specified color table is not present, raise error
+        if f'{args.color_table}.csv' not in color_tables:
+            raise ValueError('color table not valid, no csv file present.')
+        # read colormap csv file
+        color_table = genfromtxt(f'{args.color_table}.csv', delimiter=',')
+        # normalize to maximum of 1.0 in place, avoiding an intermediate array
+        numpy.multiply(color_table, 1/255.0, out=color_table)
+    if len(args.color_range) != 2*len(args.channels):
+        raise ValueError('color range must have 2 values (min/max).')
+    os.chdir(args.path)
+    # check input values with one directory pass and constant-time membership tests
+    entries={entry.name for entry in os.scandir('.') if entry.name.endswith('.ims')}
+    if not entries:
+        raise ValueError('no ims files in specified directory.')
+    if os.path.basename(args.filename) in entries:
+        raise ValueError('output filename is the same as ims file in directory.')
+    imaris_linker(args.path, args.filename, args.x_tiles, args.y_tiles,
+                  args.z_tiles, args.channels, args.color_range, args.color, color_table,
+                  max_workers=args.max_workers)